@@ -6,17 +6,25 @@ from nltk import HeldoutProbDist
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.text_processing import _normalize_text
-from src.inverted_index import InvertedIndex
+from src.inverted_index import InvertedIndex, cache_mtime, intersect_postings
 import argparse # To parse command-line arguments
-from typing import List
+from functools import lru_cache
+from typing import List, Sequence
 import json
 
 
-def search_movies(query: str) -> List[str]:
-    """Search movies by title containing the query string."""
+@lru_cache(maxsize=1)
+def _load_index(mtime: int) -> InvertedIndex:
+    """Load the inverted index once and reuse it until the cache file changes on disk."""
     idx = InvertedIndex()
+    idx.load()
+    return idx
+
+
+def search_movies(query: str) -> List[str]:
+    """Search movies whose indexed text contains every token of the query string."""
     try:
-        idx.load()
+        idx = _load_index(cache_mtime())
     except FileNotFoundError:
         print("Error: Inverted index not found. Please build the index first using the 'build' command.")
         return []
@@ -25,17 +33,29 @@ def search_movies(query: str) -> List[str]:
     if not normalized_query:
         return []
     
-    matching_doc_ids = set()    
-    for token in normalized_query[:5]:
-        doc_ids = idx.get_documents(token)
-        matching_doc_ids.update(doc_ids)
-
+    matching_doc_ids: Sequence[int]
+    if len(normalized_query) == 1:
+        # Common case: the single posting list is already the sorted result
+        matching_doc_ids = idx.get_postings(normalized_query[0])
+    else:
+        # Conjunctive (AND) semantics: a movie must contain every query token.
+        # Intersect the shortest posting lists first so the candidate set shrinks fastest.
+        posting_lists = sorted((idx.get_postings(token) for token in normalized_query[:5]), key=len)
+        matching_doc_ids = posting_lists[0]
+        for postings in posting_lists[1:]:
+            if not matching_doc_ids:
+                break
+            matching_doc_ids = intersect_postings(matching_doc_ids, postings)
+
+    # Posting lists are sorted, so the first 5 hits are the 5 lowest doc IDs
     results = []
-    for doc_id in sorted(matching_doc_ids):
+    for doc_id in matching_doc_ids:
         if doc_id in idx.docmap:
-            results.append(idx.docmap[doc_id]["title"])
+            results.append(idx.docmap[doc_id].title)
+            if len(results) == 5:
+                break
 
-    return  results[:5]
+    return results
 
 
 def main() -> None:
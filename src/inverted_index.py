@@ -1,56 +1,170 @@
 import math
 from sys import float_info
-from typing import Dict, Set, List
+from typing import Dict, List, Optional, Sequence, Tuple
 from src.text_processing import _normalize_text
+from array import array
+from bisect import bisect_left
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 import json
+import mmap
 import pickle
 import os
 
 
+MOVIES_PATH = "./data/movies.json"
+CACHE_DIR = "./cache"
+CACHE_PATH = f"{CACHE_DIR}/inverted_index.pkl"
+# Bump whenever the pickled layout changes so stale caches are rejected instead of misread
+CACHE_VERSION = 1
+MAX_TERM_COUNT = 255
+BUILD_CHUNKSIZE = 64
+
+
+@lru_cache(maxsize=1)
+def _load_movies(path: str, mtime: int) -> Tuple[Dict, ...]:
+    """Parse the movies file and cache the result, keyed on its modification time so edits invalidate it."""
+    with open(path, "r") as f:
+        movies_dict = json.load(f)
+    return tuple(movies_dict.get("movies", []))
+
+
+def _count_tokens(text: str) -> Counter:
+    """Normalize the text and count its tokens. Module-level so worker processes can run it."""
+    return Counter(_normalize_text(text))
+
+
+def cache_mtime() -> int:
+    """Return the modification time of the cache file, raising FileNotFoundError if it is missing."""
+    return os.stat(CACHE_PATH).st_mtime_ns
+
+
+def intersect_postings(a: Sequence[int], b: Sequence[int]) -> array:
+    """Intersect two ascending posting lists by binary-searching the longer one with an advancing lower bound."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = array("I")
+    lo, hi = 0, len(b)
+    for doc_id in a:
+        lo = bisect_left(b, doc_id, lo, hi)
+        if lo == hi:
+            break
+        if b[lo] == doc_id:
+            result.append(doc_id)
+            lo += 1
+    return result
+
+
+@dataclass(slots=True)
+class MovieRecord:
+    """The fields of a movie kept in the docmap, slotted to avoid a dict per movie."""
+    id: int
+    title: str
+    description: str
+
+
+class TermFrequencies:
+    """Per-document term counts stored as parallel arrays in compressed sparse row (CSR) layout."""
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.doc_ids = array("I")
+        self.indptr = array("I", [0])
+        self.term_ids = array("I")
+        self.counts = array("B")
+
+
+    def add(self, doc_id: int, token_counts: Counter) -> None:
+        """
+        Append the token counts of a document. Documents must be added in ascending doc_id order.
+
+        Counts are stored as uint8 and clipped to MAX_TERM_COUNT, where term frequency weighting is saturated anyway.
+        """
+        term_counts = sorted(
+            (self.vocab.setdefault(token, len(self.vocab)), count) for token, count in token_counts.items()
+        )
+        for term_id, count in term_counts:
+            if count > MAX_TERM_COUNT:
+                print(f"Warning: term frequency {count} in document {doc_id} clipped to {MAX_TERM_COUNT}.")
+                count = MAX_TERM_COUNT
+            self.term_ids.append(term_id)
+            self.counts.append(count)
+        self.doc_ids.append(doc_id)
+        self.indptr.append(len(self.term_ids))
+
+
+    def get(self, doc_id: int, token: str) -> int:
+        """Return the count of the token in the document, raising KeyError if the document is unknown."""
+        row = bisect_left(self.doc_ids, doc_id)
+        if row == len(self.doc_ids) or self.doc_ids[row] != doc_id:
+            raise KeyError(doc_id)
+        term_id = self.vocab.get(token)
+        if term_id is None:
+            return 0
+        start, end = self.indptr[row], self.indptr[row + 1]
+        i = bisect_left(self.term_ids, term_id, start, end)
+        if i < end and self.term_ids[i] == term_id:
+            return self.counts[i]
+        return 0
+
+
 class InvertedIndex:
     def __init__(self):
-        self.index: Dict[str, Set[int]] = {}
-        self.docmap: Dict[int, Dict] = {}
-        self.term_frequencies: Dict[int, Counter] = {}
+        self.index: Dict[str, array] = {}
+        self.docmap: Dict[int, MovieRecord] = {}
+        self.term_frequencies = TermFrequencies()
 
 
     def _add_document(self, doc_id: int, text: str) -> None:
-        """Tokenize the input text and add each token to the index with the document ID."""
-        tokens = _normalize_text(text)
-        token_counts = Counter(tokens)
+        """
+        Tokenize the input text and add each token to the index with the document ID.
+
+        Documents must be added in ascending doc_id order so that posting lists stay sorted.
+        """
+        self._add_token_counts(doc_id, _count_tokens(text))
+
 
-        for token in tokens:
-            if token not in self.index:
-                self.index[token] = set()
-            self.index[token].add(doc_id)
+    def _add_token_counts(self, doc_id: int, token_counts: Counter) -> None:
+        """Add already counted tokens of a document to the index and the term frequencies."""
+        for token in token_counts:
+            self.index.setdefault(token, array("I")).append(doc_id)
 
-        self.term_frequencies[doc_id] = token_counts
+        self.term_frequencies.add(doc_id, token_counts)
+
+
+    def get_postings(self, token: str) -> array:
+        """Return the sorted posting list of an already normalized token without copying it."""
+        return self.index.get(token, array("I"))
 
 
     def get_documents(self, term: str) -> List[int]:
-        """Get the set of document IDs for a given token and return them as a list sorted in asc order."""
+        """Get the posting list of document IDs for a given token as a list sorted in asc order."""
         normalized = _normalize_text(term)
         if not normalized:
             return []
-        token = normalized[0]
-        document_ids = self.index.get(token, set())
-        
-        return sorted(list(document_ids))
+        return self.get_postings(normalized[0]).tolist()
 
 
     def build(self) -> None:
-        """Iterate through all the movies and add them to both the index and the docmap."""
+        """
+        Iterate through all the movies and add them to both the index and the docmap.
+
+        Tokenization runs in a process pool; the results are merged serially in doc_id order.
+        """
         try:
-            with open("./data/movies.json", "r") as f:
-                movies_dict = json.load(f)
-            for movie in movies_dict.get("movies", []):
-                movie_id = movie["id"]
-                movie_title = movie.get("title", "")
-                movie_desc = movie.get("description", "")
-                text = f"{movie_title} {movie_desc}"
-                self._add_document(movie_id, text)
-                self.docmap[movie_id] = movie
+            movies = _load_movies(MOVIES_PATH, os.stat(MOVIES_PATH).st_mtime_ns)
+            records = [
+                MovieRecord(movie["id"], str(movie.get("title", "")), str(movie.get("description", "")))
+                for movie in sorted(movies, key=lambda movie: movie["id"])
+            ]
+            texts = [f"{record.title} {record.description}" for record in records]
+            with ProcessPoolExecutor() as pool:
+                all_token_counts = pool.map(_count_tokens, texts, chunksize=BUILD_CHUNKSIZE)
+                for record, token_counts in zip(records, all_token_counts):
+                    self._add_token_counts(record.id, token_counts)
+                    self.docmap[record.id] = record
             self.save()
         except FileNotFoundError:
             print("Error: ../data/movies.json not found.")
@@ -59,48 +173,76 @@ class InvertedIndex:
 
 
     def save(self) -> None:
-        """Save the index and the docmap attributes to the disk."""
-        os.makedirs("./cache", exist_ok=True)
+        """Save the index, the docmap and the term frequencies to a single file on the disk."""
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        records = self.docmap.values()
+        state = {
+            "version": CACHE_VERSION,
+            "index": self.index,
+            # Stored column-wise so records pickle as three flat sequences rather than one object each
+            "docmap": {
+                "ids": array("I", (record.id for record in records)),
+                "titles": [record.title for record in records],
+                "descriptions": [record.description for record in records],
+            },
+            "term_frequencies": self.term_frequencies,
+        }
         try:
-            with open("./cache/index.pkl", "wb") as f:
-                pickle.dump(self.index, f)
-            with open("./cache/docmap.pkl", "wb") as f:
-                pickle.dump(self.docmap, f)
-            with open("./cache/term_frequencies.pkl", "wb") as f:
-                pickle.dump(self.term_frequencies, f)
+            with open(CACHE_PATH, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
         except Exception as e:
             print(f"An error occurred while saving the index: {e}")
 
 
     def load(self) -> None:
-        """Load the index and the docmap attributes from the disk."""
+        """Load the index, the docmap and the term frequencies from the disk, memory-mapping the cache file."""
         try:
-            with open("./cache/index.pkl", "rb") as f:
-                self.index = pickle.load(f)
-            with open("./cache/docmap.pkl", "rb") as f:
-                self.docmap = pickle.load(f)
-            with open("./cache/term_frequencies.pkl", "rb") as f:
-                self.term_frequencies = pickle.load(f)
+            with open(CACHE_PATH, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                state = pickle.loads(mm)
+            if not isinstance(state, dict) or state.get("version") != CACHE_VERSION:
+                print("Error: Cache file is out of date. Please rebuild the index.")
+                return
+            self.index = state["index"]
+            columns = state["docmap"]
+            self.docmap = dict(zip(
+                columns["ids"],
+                map(MovieRecord, columns["ids"], columns["titles"], columns["descriptions"]),
+            ))
+            self.term_frequencies = state["term_frequencies"]
         except FileNotFoundError:
-            print("Error: Cache files not found. Please build the index first.")
+            print("Error: Cache file not found. Please build the index first.")
         except Exception as e:  
             print(f"An error occurred while loading the index: {e}")
 
 
-    def get_tf(self, doc_id: str, term: str) -> int:
-        """Return the times the token appears in the document with the given id"""
-        try:
-            tokenized_term = _normalize_text(term)
+    def _tokenize_term(self, term: str) -> Optional[str]:
+        """Normalize a term to its single token, returning None if nothing is left and raising if it has several."""
+        tokenized_term = _normalize_text(term)
+
+        if len(tokenized_term) == 0:
+            return None
+        if len(tokenized_term) > 1:
+            raise ValueError("Term must be a single token")
+
+        return tokenized_term[0]
 
-            if len(tokenized_term) == 0:
-                return 0
-            if len(tokenized_term) > 1:
-                raise ValueError("Term must be a single token")
 
-            if term not in self.term_frequencies[doc_id]:
+    def _idf(self, token: str) -> float:
+        """Return the Inverse Document Frequency of an already normalized token"""
+        total_docs = len(self.docmap)
+        docs_containing_term = len(self.index.get(token, ()))
+
+        return math.log((total_docs + 1) / (docs_containing_term + 1))
+
+
+    def get_tf(self, doc_id: int, term: str) -> int:
+        """Return the times the token appears in the document with the given id"""
+        try:
+            token = self._tokenize_term(term)
+            if token is None:
                 return 0
 
-            return self.term_frequencies[doc_id][term]
+            return self.term_frequencies.get(doc_id, token)
         except Exception as e:
             print(f"An error occurred while getting the term frequency: {e}")
             return 0
@@ -109,28 +251,24 @@ class InvertedIndex:
     def get_idf(self, term: str) -> float:
         """Return the Inverted Term Frequency of the term"""
         try:
-            tokenized_term = _normalize_text(term)
-            
-            if len(tokenized_term) == 0:
+            token = self._tokenize_term(term)
+            if token is None:
                 return 0
-            if len(tokenized_term) > 1:
-                raise ValueError("Term must be a single token")
 
-            token = tokenized_term[0]
-
-            total_docs = len(self.docmap)
-            doc_id_set = self.index.get(token, set())
-            docs_containing_term = len(doc_id_set)
-            
-            return math.log((total_docs + 1) / (docs_containing_term + 1))
+            return self._idf(token)
         except Exception as e:
             print(f"An error occurred while getting the Inverse Document Frequency: {e}")
             return 0
 
 
     def get_tfidf(self, doc_id: int, term: str) -> float:
-        """Return the TF-IDF score of the term in the doc_id"""
-        tf = self.get_tf(doc_id, term)
-        idf = self.get_idf(term)
+        """Return the TF-IDF score of the term in the doc_id, normalizing the term only once"""
+        try:
+            token = self._tokenize_term(term)
+            if token is None:
+                return 0
 
-        return tf * idf
\ No newline at end of file
+            return self.term_frequencies.get(doc_id, token) * self._idf(token)
+        except Exception as e:
+            print(f"An error occurred while getting the TF-IDF score: {e}")
+            return 0
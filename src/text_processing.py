@@ -5,18 +5,25 @@ import string
 
 
 stemmer = PorterStemmer()
+_PUNCTUATION_TRANSLATOR = str.maketrans("", "", string.punctuation)
+
+
+@lru_cache(maxsize=50_000)
+def _stem(word: str) -> str:
+    """Stem a word with the Porter stemmer, caching the result since vocabulary repeats heavily."""
+    return stemmer.stem(word)
 
 
 @lru_cache(maxsize=1)
-def _load_stop_words() -> set:
+def _load_stop_words() -> frozenset:
     """Load stop words from a predefioned txt file and cache the result."""
     try:
         with open("./data/stopwords.txt", "r") as f:
             stop_words = f.read().splitlines()
-        return set(stop_words)
+        return frozenset(stop_words)
     except FileNotFoundError:
         print("Error: ./data/stopwords.txt not found.")
-        return set()
+        return frozenset()
 
 
 def _normalize_text(text: str) -> List[str]:
@@ -29,15 +36,8 @@ def _normalize_text(text: str) -> List[str]:
     - Stop words removal
     - Stemming    
     """
-    if not isinstance(text, str):
-        return []
-    translator = str.maketrans("", "", string.punctuation) 
-    cleaned = text.lower().translate(translator).split()
+    cleaned = text.lower().translate(_PUNCTUATION_TRANSLATOR).split()
 
     stop_words = _load_stop_words()
-    # Remove stop words
-    cleaned = [word for word in cleaned if word not in stop_words]
-    # stemming
-    cleaned_stemmed = [stemmer.stem(word) for word in cleaned]
-
-    return cleaned_stemmed
\ No newline at end of file
+    # Remove stop words and stem in a single pass
+    return [_stem(word) for word in cleaned if word not in stop_words]
\ No newline at end of file